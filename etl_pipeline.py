@@ -6,11 +6,94 @@ This script extracts sales and product data from CSV files, transforms it into a
 star-schema format suitable for analytics, and loads it into a SQLite database.
 """
 
+import numpy as np
 import pandas as pd
 import sqlite3
 import os
+import errno
 from datetime import datetime
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def compute_revenue(quantity, price):
+        """multiplies quantity by price element-wise in a single parallel pass."""
+        out = np.empty(price.size, dtype=np.float64)
+        for i in prange(price.size):
+            out[i] = quantity[i] * price[i]
+        return out
+
+    @njit(cache=True)
+    def compute_quarter(month):
+        """maps month numbers (1-12) to quarter numbers (1-4)."""
+        out = np.empty(month.size, dtype=np.int32)
+        for i in range(month.size):
+            out[i] = (month[i] - 1) // 3 + 1
+        return out
+
+    @njit(parallel=True, cache=True)
+    def compute_date_key_bytes(year, month, day):
+        """writes each date as 10 ASCII bytes (YYYY-MM-DD) into a uint8[N, 10] buffer."""
+        out = np.empty((year.size, 10), dtype=np.uint8)
+        for i in prange(year.size):
+            y = year[i]
+            m = month[i]
+            d = day[i]
+            out[i, 0] = 48 + y // 1000
+            out[i, 1] = 48 + y // 100 % 10
+            out[i, 2] = 48 + y // 10 % 10
+            out[i, 3] = 48 + y % 10
+            out[i, 4] = 45
+            out[i, 5] = 48 + m // 10
+            out[i, 6] = 48 + m % 10
+            out[i, 7] = 45
+            out[i, 8] = 48 + d // 10
+            out[i, 9] = 48 + d % 10
+        return out
+else:
+    def compute_revenue(quantity, price):
+        """multiplies quantity by price element-wise."""
+        return np.multiply(quantity, price)
+
+    def compute_quarter(month):
+        """maps month numbers (1-12) to quarter numbers (1-4)."""
+        return ((month - 1) // 3 + 1).astype(np.int32)
+
+    def compute_date_key_bytes(year, month, day):
+        """writes each date as 10 ASCII bytes (YYYY-MM-DD) into a uint8[N, 10] buffer."""
+        dash = np.full(year.size, 45)
+        return np.stack([
+            48 + year // 1000, 48 + year // 100 % 10, 48 + year // 10 % 10, 48 + year % 10,
+            dash,
+            48 + month // 10, 48 + month % 10,
+            dash,
+            48 + day // 10, 48 + day % 10
+        ], axis=1).astype(np.uint8)
+
+
+def format_date_keys(year, month, day):
+    """
+    formats year/month/day integer arrays as YYYY-MM-DD date keys.
+    avoids strftime by packing the ASCII digits directly.
+    """
+    buf = compute_date_key_bytes(year, month, day)
+    return buf.view('S10').ravel().astype('U10')
+
+
+def to_rows(df):
+    """
+    converts a DataFrame into a list of tuples for executemany.
+    missing values (NaN, pd.NA) become None so sqlite3 stores them as NULL.
+    """
+    return df.astype(object).where(df.notna(), None).to_records(index=False).tolist()
+
+
 class SalesETL:
     """ETL pipeline for sales data."""
     
@@ -79,34 +162,87 @@ class SalesETL:
         self.conn.commit()
         print(f"Database setup complete: {self.db_name}")
 
-    def load_csv_files(self, orders_file='data/orders.csv', products_file='data/products.csv'):
+    def load_csv_files(self, orders_file='data/orders.csv', products_file='data/products.csv', chunksize=100_000):
         """
-        loads orders and products CSV files into pandas DataFrames.
+        loads the products CSV into a pandas DataFrame and checks the orders CSV,
+        which is later streamed in chunks by read_order_chunks.
         returns False if any file is missing.
         """
         try:
-            self.orders = pd.read_csv(orders_file)
-            self.products = pd.read_csv(products_file)
-            print(f"Loaded {len(self.orders)} orders and {len(self.products)} products")
+            self.products = pd.read_csv(
+                products_file,
+                engine='pyarrow',
+                dtype={
+                    'ProductID': 'category',
+                    'ProductName': 'string',
+                    'Category': 'category',
+                    'Cost': 'float64'
+                }
+            )
+            if not os.path.exists(orders_file):
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), orders_file)
+            self.orders_file = orders_file
+            self.chunksize = chunksize
+            self.customer_ids = set()
+            self.order_days = set()
+            print(f"Loaded {len(self.products)} products, streaming orders in chunks of {chunksize}")
             return True
         except FileNotFoundError as e:
             print(f"Missing file: {e}")
             return False
 
-    def process_data(self):
+    def read_order_chunks(self):
         """
-        transforms raw CSV data into a format suitable for the star schema.
-        computes revenue, date dimensions, and prepares dimension tables.
+        yields the orders CSV as DataFrames of at most chunksize rows.
+        the file is only held open while the chunks are being iterated.
+        """
+        #the pyarrow engine does not support chunksize, so orders use the C engine
+        with pd.read_csv(
+            self.orders_file,
+            chunksize=self.chunksize,
+            dtype={
+                'OrderID': 'int64',
+                'ProductID': 'category',
+                'CustomerID': 'category',
+                'Quantity': 'int32',
+                'Price': 'float64'
+            },
+            parse_dates=['OrderDate']
+        ) as reader:
+            yield from reader
+
+    def process_data(self, orders):
         """
-        orders = self.orders.copy()
+        transforms one chunk of raw orders into fact rows for the star schema.
+        computes revenue and date keys, and collects customers and dates seen
+        so far for the dimension tables.
+        """
+        #chunks come fresh from the reader, so columns are added in place
         #compute revenue per order 
-        orders['revenue'] = orders['Quantity'] * orders['Price']
-        orders['OrderDate'] = pd.to_datetime(orders['OrderDate'])
-        orders['date_key'] = orders['OrderDate'].dt.strftime('%Y-%m-%d')
+        orders['revenue'] = compute_revenue(orders['Quantity'].to_numpy(), orders['Price'].to_numpy())
+        #an empty chunk (header-only file) keeps OrderDate as object dtype, so force datetime
+        od = pd.to_datetime(orders['OrderDate'])
+        #blank order dates get a NULL date key; only valid dates are packed
+        valid = od.notna().to_numpy()
+        dated = od[valid]
+        date_keys = np.full(len(od), None, dtype=object)
+        date_keys[valid] = format_date_keys(
+            dated.dt.year.to_numpy(), dated.dt.month.to_numpy(), dated.dt.day.to_numpy()
+        )
+        orders['date_key'] = date_keys
         
-        #merge orders with product info
-        self.sales_data = pd.merge(orders, self.products, on='ProductID', how='left')
+        #product attributes live in dim_product, so the fact rows need no join
+        self.sales_data = orders[['OrderID', 'ProductID', 'CustomerID', 'date_key', 'Quantity', 'Price', 'revenue']]
         
+        #collect customer and date dimension members, skipping blank ids and dates
+        self.customer_ids.update(orders['CustomerID'].dropna().unique())
+        self.order_days.update(np.unique(dated.values.astype('datetime64[D]')).tolist())
+
+    def build_dimensions(self):
+        """
+        prepares the product, customer and date dimension tables
+        once all order chunks have been processed.
+        """
         #prepare product dimension
         self.product_dim = self.products.rename(columns={
             'ProductID': 'product_id',
@@ -117,37 +253,40 @@ class SalesETL:
         
         #prepare customer dimension
         self.customer_dim = pd.DataFrame({
-            'customer_id': orders['CustomerID'].unique()
+            'customer_id': sorted(self.customer_ids)
         })
         
         #prepare date dimension
-        unique_dates = orders['OrderDate'].dt.date.unique()
-        date_rows = []
-        for date in unique_dates:
-            dt = pd.to_datetime(date)
-            quarter = (dt.month - 1) // 3 + 1
-            date_rows.append({
-                'date_key': date.strftime('%Y-%m-%d'),
-                'full_date': date,
-                'year': dt.year,
-                'month': dt.month,
-                'day': dt.day,
-                'month_name': dt.strftime('%B'),
-                'quarter': quarter
-            })
-        
-        self.date_dim = pd.DataFrame(date_rows)
+        dates = pd.DatetimeIndex(sorted(self.order_days))
+        years = dates.year.to_numpy()
+        months = dates.month.to_numpy()
+        days = dates.day.to_numpy()
+        date_keys = format_date_keys(years, months, days)
+        self.date_dim = pd.DataFrame({
+            'date_key': date_keys,
+            #store the ISO string rather than relying on sqlite3's deprecated date adapter
+            'full_date': date_keys,
+            'year': years,
+            'month': months,
+            'day': days,
+            'month_name': dates.month_name(),
+            'quarter': compute_quarter(months)
+        })
         print("Data processing is completed")
 
-    def save_to_database(self):
+    def prepare_bulk_load(self):
         """
-        saves all prepared data into the SQLite database.
-        inserts dimension tables first, then the fact table.
+        relaxes SQLite durability settings for the bulk load.
+        """
+        self.conn.execute('PRAGMA synchronous=OFF')
+        self.conn.execute('PRAGMA journal_mode=MEMORY')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+
+    def save_fact_chunk(self):
+        """
+        inserts the fact rows of the most recently processed chunk.
+        returns the number of rows written.
         """
-        self.product_dim.to_sql('dim_product', self.conn, if_exists='append', index=False)
-        self.customer_dim.to_sql('dim_customer', self.conn, if_exists='append', index=False)
-        self.date_dim.to_sql('dim_date', self.conn, if_exists='append', index=False)
-        
         #prepare fact table columns
         fact_data = self.sales_data.rename(columns={
             'OrderID': 'order_id',
@@ -157,29 +296,72 @@ class SalesETL:
             'Price': 'price'
         })[['order_id', 'product_id', 'customer_id', 'date_key', 'quantity', 'price', 'revenue']]
         
-        fact_data.to_sql('fact_sales', self.conn, if_exists='append', index=False)
-        self.conn.commit()
-        
-        print
-        (f"Saved {len(fact_data)} sales records to database")
+        rows = to_rows(fact_data)
+        self.conn.executemany('''
+            INSERT INTO fact_sales (order_id, product_id, customer_id, date_key, quantity, price, revenue)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        return len(rows)
+
+    def save_dimensions(self):
+        """
+        inserts the prepared dimension tables.
+        """
+        self.conn.executemany('''
+            INSERT INTO dim_product (product_id, product_name, category, cost)
+            VALUES (?, ?, ?, ?)
+        ''', to_rows(self.product_dim[['product_id', 'product_name', 'category', 'cost']]))
+        self.conn.executemany('''
+            INSERT INTO dim_customer (customer_id)
+            VALUES (?)
+        ''', to_rows(self.customer_dim[['customer_id']]))
+        self.conn.executemany('''
+            INSERT INTO dim_date (date_key, full_date, year, month, day, month_name, quarter)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', to_rows(self.date_dim[['date_key', 'full_date', 'year', 'month', 'day', 'month_name', 'quarter']]))
+
+    def create_indexes(self):
+        """
+        indexes the fact table join columns once the bulk load is complete,
+        then refreshes the query planner statistics.
+        """
+        with self.conn:
+            self.conn.execute('CREATE INDEX idx_fact_product ON fact_sales(product_id)')
+            self.conn.execute('CREATE INDEX idx_fact_customer ON fact_sales(customer_id)')
+            self.conn.execute('CREATE INDEX idx_fact_date ON fact_sales(date_key)')
+            self.conn.execute('ANALYZE')
 
-    def run_pipeline(self, orders_file='data/orders.csv', products_file='data/products.csv'):
+    def run_pipeline(self, orders_file='data/orders.csv', products_file='data/products.csv', chunksize=100_000):
         """
         Executes the complete ETL pipeline:
         1. Set up database
-        2. Load CSV files
-        3. Process and transform data
-        4. Save data to database
+        2. Load products and check the orders CSV
+        3. Process each orders chunk and save its fact rows
+        4. Build and save dimension tables
+        5. Index the fact table
         Returns True if successful, False otherwise.
         """        
         try:
             self.setup_database()\
             
-            if not self.load_csv_files(orders_file, products_file):
+            if not self.load_csv_files(orders_file, products_file, chunksize):
                 return False
+            
+            self.prepare_bulk_load()
+            
+            #stream orders chunk by chunk; every insert shares a single transaction
+            saved = 0
+            with self.conn:
+                for chunk in self.read_order_chunks():
+                    self.process_data(chunk)
+                    saved += self.save_fact_chunk()
                 
-            self.process_data()
-            self.save_to_database()
+                self.build_dimensions()
+                self.save_dimensions()
+            
+            self.create_indexes()
+            
+            print(f"Saved {saved} sales records to database")
             
             print("ETL completed successfully!")
             return True
@@ -229,7 +411,7 @@ def create_test_data():
     ]
     
     with open('data/orders.csv', 'w') as f:
-        f.write('\n'.join(orders))
+        f.writelines(line + '\n' for line in orders)
     
     products = [
         "ProductID,ProductName,Category,Cost",
@@ -240,7 +422,7 @@ def create_test_data():
     ]
     
     with open('data/products.csv', 'w') as f:
-        f.write('\n'.join(products))
+        f.writelines(line + '\n' for line in products)
     
     print("Test data created")
 
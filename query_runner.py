@@ -15,25 +15,67 @@ logger = logging.getLogger(__name__)
 class QueryRunner:
     def __init__(self, db_path='sales_datawarehouse.db'):
         self.db_path = db_path
+        #one connection for all queries keeps sqlite's statement and page caches warm
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute('PRAGMA cache_size=-65536')
+        self.aggregate_ready = False
     
-    def run_query(self, query, description="Query Result"):
-        """run a SQL query and return formatted results"""
+    def close(self):
+        """close the shared database connection"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+    
+    def build_sales_aggregate(self):
+        """
+        materialize FactSales pre-aggregated by product, customer and date
+        into a temp table, so the analytical queries scan the fact table once.
+        the table is a snapshot: run_all_queries rebuilds it on every run, but
+        standalone run_* calls reuse it, so call this again after the
+        warehouse changes
+        """
+        self.conn.execute("DROP TABLE IF EXISTS temp.SalesAgg")
+        self.conn.execute("""
+        CREATE TEMP TABLE SalesAgg AS
+        SELECT 
+            ProductID,
+            CustomerID,
+            DateKey,
+            SUM(Revenue) as Revenue,
+            SUM(Quantity) as Quantity,
+            SUM(Price) as PriceSum,
+            COUNT(OrderID) as OrderCount
+        FROM FactSales
+        GROUP BY ProductID, CustomerID, DateKey;
+        """)
+        self.aggregate_ready = True
+    
+    def run_query(self, query, description="Query Result", uses_aggregate=False, as_df=False):
+        """
+        run a SQL query and print formatted results.
+        returns the result rows, or a DataFrame when as_df is set
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            if uses_aggregate and not self.aggregate_ready:
+                self.build_sales_aggregate()
+            
+            cursor = self.conn.execute(query)
+            headers = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
             
             print(f"\n{'='*80}")
             print(f"{description}")
             print('='*80)
             
-            if df.empty:
+            if not rows:
                 print("No results found.")
             else:
-                print(tabulate(df, headers='keys', tablefmt='grid', showindex=False))
-                print(f"\nTotal rows: {len(df)}")
+                print(tabulate(rows, headers=headers, tablefmt='grid'))
+                print(f"\nTotal rows: {len(rows)}")
             
-            return df
+            if as_df:
+                return pd.DataFrame(rows, columns=headers)
+            return rows
             
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
@@ -48,19 +90,20 @@ class QueryRunner:
             d.Month,
             d.MonthName,
             p.Category,
-            ROUND(SUM(f.Revenue), 2) as TotalRevenue,
-            COUNT(f.OrderID) as NumberOfOrders,
-            SUM(f.Quantity) as TotalQuantitySold
-        FROM FactSales f
-        JOIN DimProduct p ON f.ProductID = p.ProductID
-        JOIN DimDate d ON f.DateKey = d.DateKey
+            ROUND(SUM(a.Revenue), 2) as TotalRevenue,
+            SUM(a.OrderCount) as NumberOfOrders,
+            SUM(a.Quantity) as TotalQuantitySold
+        FROM SalesAgg a
+        JOIN DimProduct p ON a.ProductID = p.ProductID
+        JOIN DimDate d ON a.DateKey = d.DateKey
         GROUP BY d.Year, d.Month, d.MonthName, p.Category
         ORDER BY d.Year, d.Month, p.Category;
         """
         
         return self.run_query(
             query, 
-            "MAIN BUSINESS QUESTION: Total revenue for each product category for each month"
+            "MAIN BUSINESS QUESTION: Total revenue for each product category for each month",
+            uses_aggregate=True
         )
     
     def run_monthly_summary(self):
@@ -70,18 +113,18 @@ class QueryRunner:
             d.Year,
             d.Month,
             d.MonthName,
-            COUNT(DISTINCT f.ProductID) as UniqueProducts,
-            COUNT(f.OrderID) as TotalOrders,
-            SUM(f.Quantity) as TotalQuantity,
-            ROUND(SUM(f.Revenue), 2) as TotalRevenue,
-            ROUND(AVG(f.Revenue), 2) as AverageOrderValue
-        FROM FactSales f
-        JOIN DimDate d ON f.DateKey = d.DateKey
+            COUNT(DISTINCT a.ProductID) as UniqueProducts,
+            SUM(a.OrderCount) as TotalOrders,
+            SUM(a.Quantity) as TotalQuantity,
+            ROUND(SUM(a.Revenue), 2) as TotalRevenue,
+            ROUND(SUM(a.Revenue) / SUM(a.OrderCount), 2) as AverageOrderValue
+        FROM SalesAgg a
+        JOIN DimDate d ON a.DateKey = d.DateKey
         GROUP BY d.Year, d.Month, d.MonthName
         ORDER BY d.Year, d.Month;
         """
         
-        return self.run_query(query, "MONTHLY SALES SUMMARY")
+        return self.run_query(query, "MONTHLY SALES SUMMARY", uses_aggregate=True)
     
     def run_product_performance(self):
         """Product performance analysis"""
@@ -89,80 +132,80 @@ class QueryRunner:
         SELECT 
             p.ProductName,
             p.Category,
-            COUNT(f.OrderID) as TimesOrdered,
-            SUM(f.Quantity) as TotalQuantitySold,
-            ROUND(SUM(f.Revenue), 2) as TotalRevenue,
-            ROUND(AVG(f.Price), 2) as AverageSellingPrice,
-            ROUND(SUM(f.Revenue) - SUM(p.Cost * f.Quantity), 2) as TotalProfit,
-            ROUND((SUM(f.Revenue) - SUM(p.Cost * f.Quantity)) / SUM(f.Revenue) * 100, 2) as ProfitMarginPercent
-        FROM FactSales f
-        JOIN DimProduct p ON f.ProductID = p.ProductID
+            SUM(a.OrderCount) as TimesOrdered,
+            SUM(a.Quantity) as TotalQuantitySold,
+            ROUND(SUM(a.Revenue), 2) as TotalRevenue,
+            ROUND(SUM(a.PriceSum) / SUM(a.OrderCount), 2) as AverageSellingPrice,
+            ROUND(SUM(a.Revenue) - SUM(p.Cost * a.Quantity), 2) as TotalProfit,
+            ROUND((SUM(a.Revenue) - SUM(p.Cost * a.Quantity)) / SUM(a.Revenue) * 100, 2) as ProfitMarginPercent
+        FROM SalesAgg a
+        JOIN DimProduct p ON a.ProductID = p.ProductID
         GROUP BY p.ProductID, p.ProductName, p.Category
         ORDER BY TotalRevenue DESC;
         """
         
-        return self.run_query(query, "PRODUCT PERFORMANCE ANALYSIS")
+        return self.run_query(query, "PRODUCT PERFORMANCE ANALYSIS", uses_aggregate=True)
     
     def run_customer_analysis(self):
         """Customer analysis"""
         query = """
         SELECT 
-            f.CustomerID,
-            COUNT(f.OrderID) as NumberOfOrders,
-            SUM(f.Quantity) as TotalItemsPurchased,
-            ROUND(SUM(f.Revenue), 2) as TotalSpent,
-            ROUND(AVG(f.Revenue), 2) as AverageOrderValue,
-            COUNT(DISTINCT f.ProductID) as UniqueProductsPurchased
-        FROM FactSales f
-        GROUP BY f.CustomerID
+            a.CustomerID,
+            SUM(a.OrderCount) as NumberOfOrders,
+            SUM(a.Quantity) as TotalItemsPurchased,
+            ROUND(SUM(a.Revenue), 2) as TotalSpent,
+            ROUND(SUM(a.Revenue) / SUM(a.OrderCount), 2) as AverageOrderValue,
+            COUNT(DISTINCT a.ProductID) as UniqueProductsPurchased
+        FROM SalesAgg a
+        GROUP BY a.CustomerID
         ORDER BY TotalSpent DESC;
         """
         
-        return self.run_query(query, "CUSTOMER ANALYSIS")
+        return self.run_query(query, "CUSTOMER ANALYSIS", uses_aggregate=True)
     
     def run_category_comparison(self):
         """category performance comparison"""
         query = """
         SELECT 
             p.Category,
-            COUNT(f.OrderID) as TotalOrders,
-            COUNT(DISTINCT f.CustomerID) as UniqueCustomers,
-            SUM(f.Quantity) as TotalQuantitySold,
-            ROUND(SUM(f.Revenue), 2) as TotalRevenue,
-            ROUND(AVG(f.Revenue), 2) as AverageOrderValue,
-            ROUND(SUM(f.Revenue) / COUNT(DISTINCT f.CustomerID), 2) as RevenuePerCustomer
-        FROM FactSales f
-        JOIN DimProduct p ON f.ProductID = p.ProductID
+            SUM(a.OrderCount) as TotalOrders,
+            COUNT(DISTINCT a.CustomerID) as UniqueCustomers,
+            SUM(a.Quantity) as TotalQuantitySold,
+            ROUND(SUM(a.Revenue), 2) as TotalRevenue,
+            ROUND(SUM(a.Revenue) / SUM(a.OrderCount), 2) as AverageOrderValue,
+            ROUND(SUM(a.Revenue) / COUNT(DISTINCT a.CustomerID), 2) as RevenuePerCustomer
+        FROM SalesAgg a
+        JOIN DimProduct p ON a.ProductID = p.ProductID
         GROUP BY p.Category
         ORDER BY TotalRevenue DESC;
         """
         
-        return self.run_query(query, "CATEGORY PERFORMANCE COMPARISON")
+        return self.run_query(query, "CATEGORY PERFORMANCE COMPARISON", uses_aggregate=True)
     
     def run_data_quality_check(self):
         """data quality verification"""
         query = """
-        SELECT 'Missing Product References' as CheckType, COUNT(*) as Count
-        FROM FactSales f
-        LEFT JOIN DimProduct p ON f.ProductID = p.ProductID
+        SELECT 'Missing Product References' as CheckType, COALESCE(SUM(a.OrderCount), 0) as Count
+        FROM SalesAgg a
+        LEFT JOIN DimProduct p ON a.ProductID = p.ProductID
         WHERE p.ProductID IS NULL
 
         UNION ALL
 
-        SELECT 'Missing Date References' as CheckType, COUNT(*) as Count
-        FROM FactSales f
-        LEFT JOIN DimDate d ON f.DateKey = d.DateKey
+        SELECT 'Missing Date References' as CheckType, COALESCE(SUM(a.OrderCount), 0) as Count
+        FROM SalesAgg a
+        LEFT JOIN DimDate d ON a.DateKey = d.DateKey
         WHERE d.DateKey IS NULL
 
         UNION ALL
 
-        SELECT 'Missing Customer References' as CheckType, COUNT(*) as Count
-        FROM FactSales f
-        LEFT JOIN DimCustomer c ON f.CustomerID = c.CustomerID
+        SELECT 'Missing Customer References' as CheckType, COALESCE(SUM(a.OrderCount), 0) as Count
+        FROM SalesAgg a
+        LEFT JOIN DimCustomer c ON a.CustomerID = c.CustomerID
         WHERE c.CustomerID IS NULL;
         """
         
-        return self.run_query(query, "DATA QUALITY CHECK")
+        return self.run_query(query, "DATA QUALITY CHECK", uses_aggregate=True)
     
     def run_all_queries(self):
         """run all analytical queries"""
@@ -170,10 +213,8 @@ class QueryRunner:
         
     
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            cursor = self.conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
             tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
             
             if not tables:
                 print("Error: Database is empty or doesn't exist.")
@@ -181,6 +222,9 @@ class QueryRunner:
                 
             print(f"Found tables: {', '.join(tables)}")
             
+            #scan FactSales once; every query below reads the aggregate
+            self.build_sales_aggregate()
+            
         except Exception as e:
             print(f"Error connecting to database: {e}")
             return
@@ -199,7 +243,10 @@ class QueryRunner:
 
 def main():
     runner = QueryRunner()
-    runner.run_all_queries()
+    try:
+        runner.run_all_queries()
+    finally:
+        runner.close()
 
 if __name__ == "__main__":
     main()